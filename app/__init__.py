@@ -1,6 +1,5 @@
 
 from __future__ import annotations
-from flask import Flask
 from .main import create_app
 
 __all__ = ["create_app"]
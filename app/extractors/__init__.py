@@ -1,5 +1,5 @@
 
 from __future__ import annotations
 # Re-export for convenience
-from .pdf_basic import extract_document
-__all__ = ["extract_document"]
+from .pdf_basic import extract_document, extract_documents
+__all__ = ["extract_document", "extract_documents"]
@@ -0,0 +1,49 @@
+# app/extractors/doc_cache.py
+from __future__ import annotations
+import copy
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# Résultats d'extract_document indexés par SHA1 du contenu : un même fichier
+# renvoyé (retry, file d'attente) ne repasse ni par l'extraction texte ni par l'OCR.
+# Cache mémoire par worker (LRU), désactivé avec EXTRACT_CACHE_SIZE=0.
+try:
+    CACHE_SIZE = max(0, int(os.getenv("EXTRACT_CACHE_SIZE", "64")))
+except ValueError:
+    CACHE_SIZE = 64
+MAX_BYTES = 50 * 1024 * 1024
+NO_CACHE_OCR_MODES = {"force", "pdf_ocr"}
+
+_CACHE: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_LOCK = threading.Lock()
+
+def cache_key(path: Path, ocr: str) -> Optional[str]:
+    if CACHE_SIZE <= 0 or ocr in NO_CACHE_OCR_MODES:
+        return None
+    try:
+        if path.stat().st_size > MAX_BYTES:
+            return None
+        digest = hashlib.sha1(path.read_bytes()).hexdigest()
+    except OSError:
+        return None
+    return f"{digest}:{path.suffix.lower()}:{ocr}"
+
+def cache_get(key: str) -> Optional[Dict[str, Any]]:
+    with _LOCK:
+        hit = _CACHE.get(key)
+        if hit is None:
+            return None
+        _CACHE.move_to_end(key)
+    return copy.deepcopy(hit)
+
+def cache_put(key: str, result: Dict[str, Any]) -> None:
+    snapshot = copy.deepcopy(result)
+    with _LOCK:
+        _CACHE[key] = snapshot
+        _CACHE.move_to_end(key)
+        while len(_CACHE) > CACHE_SIZE:
+            _CACHE.popitem(last=False)
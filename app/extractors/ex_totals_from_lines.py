@@ -1,19 +1,28 @@
 # app/extractors/ex_totals_from_lines.py
 from __future__ import annotations
+import math
 from typing import Dict, List
 from .candidates import Cand
 
+def _coerce_amount(v) -> float:
+    # chemin rapide : les parseurs de lignes produisent déjà des float
+    t = type(v)
+    if t is float:
+        return v
+    if t is int:
+        return float(v)
+    if v is None:
+        return 0.0
+    try:
+        return float(str(v).replace(" ","").replace(",","."))
+    except Exception:
+        return 0.0
+
 def ex_totals_from_lines(doc: Dict[str, any]) -> List[Cand]:
     rows = doc.get("lines") or []
     if not rows:
         return []
-    s = 0.0
-    for r in rows:
-        try:
-            amt = float(str(r.get("amount","")).replace(" ","").replace(",","."))
-        except Exception:
-            amt = 0.0
-        s += amt
+    s = math.fsum(_coerce_amount(r.get("amount")) for r in rows)
     if s <= 0:
         return []
     return [Cand(field="total_ht", value=round(s,2), conf=0.65, source="table")]
@@ -4,8 +4,8 @@ import re
 from typing import Dict, Any, Tuple, Optional
 from .patterns import (
     FACTURE_NO_RE, INVOICE_NUM_RE, DATE_RE, EUR_STRICT_RE,
-    TOTAL_TTC_NEAR_RE, TOTAL_HT_NEAR_RE, TVA_AMOUNT_NEAR_RE,
-    SELLER_BLOCK, CLIENT_BLOCK, EMETTEUR_BLOCK, DESTINATAIRE_BLOCK,
+    TOTAL_TTC_NEAR_RE, TOTAL_HT_NEAR_RE, TOTALS_NEAR_ANY_RE,
+    SELLER_BLOCK, CLIENT_BLOCK, EMETTEUR_BLOCK,
     TVA_RE, SIRET_RE, SIREN_RE, IBAN_RE
 )
 from .utils_amounts import _norm_amount, _clean_block
@@ -22,15 +22,21 @@ def _extract_invoice_date(text: str) -> Optional[str]:
 def _extract_totals(text: str) -> Dict[str, Any]:
     total_ttc = total_ht = total_tva = None
     # proximity: look at lines
+    # une seule regex écarte les lignes sans libellé ; la priorité TTC > HT > TVA
+    # n'est départagée que sur les lignes restantes
     for line in text.splitlines():
-        low = line.lower()
-        if TOTAL_TTC_NEAR_RE.search(low):
+        hit = TOTALS_NEAR_ANY_RE.search(line)
+        if not hit:
+            continue
+        # aucun libellé avant hit.start() ; le groupe gagnant est déjà acquis
+        pos, kind = hit.start(), hit.lastgroup
+        if kind == "ttc" or TOTAL_TTC_NEAR_RE.search(line, pos):
             m = EUR_STRICT_RE.search(line)
             if m: total_ttc = _norm_amount(m.group(0))
-        elif TOTAL_HT_NEAR_RE.search(low):
+        elif kind == "ht" or TOTAL_HT_NEAR_RE.search(line, pos):
             m = EUR_STRICT_RE.search(line)
             if m: total_ht = _norm_amount(m.group(0))
-        elif TVA_AMOUNT_NEAR_RE.search(low):
+        else:
             m = EUR_STRICT_RE.search(line)
             if m: total_tva = _norm_amount(m.group(0))
     return {"total_ht": total_ht, "total_tva": total_tva, "total_ttc": total_ttc}
@@ -38,8 +44,8 @@ def _extract_totals(text: str) -> Dict[str, Any]:
 def _extract_parties(text: str) -> Tuple[Optional[str], Optional[str]]:
     seller = (_first_group(SELLER_BLOCK.search(text)) or
               _first_group(EMETTEUR_BLOCK.search(text)))
-    buyer = (_first_group(CLIENT_BLOCK.search(text)) or
-             _first_group(DESTINATAIRE_BLOCK.search(text)))
+    # CLIENT_BLOCK couvre déjà "destinataire" : pas de seconde passe DESTINATAIRE_BLOCK
+    buyer = _first_group(CLIENT_BLOCK.search(text))
     return _clean_block(seller), _clean_block(buyer)
 
 def _fill_fields_from_text(text: str) -> Dict[str, Any]:
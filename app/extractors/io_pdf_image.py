@@ -2,46 +2,147 @@
 from __future__ import annotations
 from typing import Tuple, Dict, Any, Optional, List
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import os
+import threading
 
-# We keep imports optional to avoid hard failures at runtime
-try:
-    from PIL import Image
-except Exception:
-    Image = None  # type: ignore
+# We keep imports optional to avoid hard failures at runtime.
+# tesserocr charge libtesseract : import différé au premier OCR, pas à l'import du module
+_TESSEROCR: Any = None  # module tesserocr, False si indisponible
 
-def pdf_text(path: Path) -> Tuple[str, Dict[str, Any]]:
+def _tesserocr():
+    global _TESSEROCR
+    if _TESSEROCR is None:
+        try:
+            import tesserocr  # type: ignore
+            _TESSEROCR = tesserocr
+        except Exception:
+            _TESSEROCR = False
+    return _TESSEROCR or None
+
+# tesserocr garde l'API tesseract chargée (pas de ré-init par page / document).
+# Une API n'est pas thread-safe : on en garde une par thread et par langue.
+_TESS_LOCAL = threading.local()
+# langues dont l'init a échoué (données absentes...) : pytesseract direct, sans réessayer à chaque page
+_TESS_FAILED: set = set()
+
+def _tess_api(lang: str):
+    apis = getattr(_TESS_LOCAL, "apis", None)
+    if apis is None:
+        apis = _TESS_LOCAL.apis = {}
+    api = apis.get(lang)
+    if api is None:
+        try:
+            api = _tesserocr().PyTessBaseAPI(lang=lang)
+        except Exception:
+            _TESS_FAILED.add(lang)
+            raise
+        apis[lang] = api
+    return api
+
+# Pool persistant : les threads (et donc leurs API tesserocr) survivent entre documents.
+_OCR_POOL: Optional[ThreadPoolExecutor] = None
+_OCR_POOL_LOCK = threading.Lock()
+
+def _ocr_workers() -> int:
+    try:
+        return max(1, int(os.getenv("OCR_WORKERS", "")))
+    except ValueError:
+        return 1
+
+def _ocr_pool() -> ThreadPoolExecutor:
+    global _OCR_POOL
+    with _OCR_POOL_LOCK:
+        if _OCR_POOL is None:
+            _OCR_POOL = ThreadPoolExecutor(max_workers=_ocr_workers(), thread_name_prefix="ocr")
+        return _OCR_POOL
+
+def _ocr_pil(img, lang: str) -> Tuple[str, str]:
+    """
+    OCR a PIL image, reusing the tesserocr API when available.
+    Returns (text, engine)
+    """
+    if lang not in _TESS_FAILED and _tesserocr() is not None:
+        try:
+            api = _tess_api(lang)
+            api.SetImage(img)
+            return api.GetUTF8Text() or "", "tesserocr"
+        except Exception:
+            pass
+    import pytesseract  # type: ignore
+    return pytesseract.image_to_string(img, lang=lang) or "", "pytesseract"
+
+# PDFium n'est pas thread-safe, même sur des documents distincts : tout appel
+# (ouverture, textpage, fermeture) passe par ce verrou (gunicorn --threads)
+_PDFIUM_LOCK = threading.Lock()
+
+def _pdfium_pages(path: Path) -> List[str]:
+    import pypdfium2 as pdfium  # type: ignore
+    with _PDFIUM_LOCK:
+        pdf = pdfium.PdfDocument(str(path))
+        try:
+            pages = []
+            for i in range(len(pdf)):
+                page = pdf[i]
+                try:
+                    tp = page.get_textpage()
+                    # pdfium sépare les lignes par \r\n
+                    pages.append((tp.get_text_range() or "").replace("\r\n", "\n"))
+                    tp.close()
+                finally:
+                    page.close()
+            return pages
+        finally:
+            pdf.close()
+
+def _reset_after_fork() -> None:
+    # un fork ne copie que le thread appelant : le pool OCR hérité n'a plus de threads
+    # (recréé à la demande) et un verrou tenu par un autre thread ne serait jamais relâché
+    global _OCR_POOL, _OCR_POOL_LOCK, _PDFIUM_LOCK
+    _OCR_POOL = None
+    _OCR_POOL_LOCK = threading.Lock()
+    _PDFIUM_LOCK = threading.Lock()
+
+if hasattr(os, "register_at_fork"):  # absent sous Windows
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+def pdf_text(path: Path, fallback_on_empty: bool = True) -> Tuple[str, Dict[str, Any]]:
     """
-    Try to extract text from a PDF using PyPDF2 if available.
+    Extract the PDF text layer with pypdfium2, falling back to pdfminer.six.
+    pdfminer runs when pdfium fails, or when it finds no text and
+    fallback_on_empty is set.
     Returns (text, info)
     """
     info: Dict[str, Any] = {"engine": "none"}
     text = ""
     try:
-        import PyPDF2  # type: ignore
-        info["engine"] = "PyPDF2"
-        with open(path, "rb") as f:
-            reader = PyPDF2.PdfReader(f)
-            pages = []
-            for p in reader.pages:
-                try:
-                    pages.append(p.extract_text() or "")
-                except Exception:
-                    pages.append("")
-            text = "\\n\\f\\n".join(pages).strip()
+        pages = _pdfium_pages(path)
+        info["pages"] = len(pages)
+        text = "\n\f\n".join(pages).strip()
+        info["engine"] = "pypdfium2"
+    except Exception as e:
+        info["pdfium_error"] = str(e)
+    if text or ("pdfium_error" not in info and not fallback_on_empty):
+        return text, info
+    try:
+        from pdfminer.high_level import extract_text as pdfminer_extract_text  # type: ignore
+        info["engine"] = "pdfminer"
+        # pdfminer termine chaque page par \f
+        raw = pdfminer_extract_text(str(path)) or ""
+        text = "\n\f\n".join(raw.split("\f")).strip()
     except Exception as e:
         info["error"] = f"pdf_read_error:{e}"
     return text, info
 
 def ocr_image_to_text(path: Path, lang: str = "fra") -> Tuple[str, Dict[str, Any]]:
     """
-    OCR an image file if pytesseract is available.
+    OCR an image file with tesserocr (reused API) or pytesseract.
     """
     info: Dict[str, Any] = {"engine": "pytesseract", "lang": lang}
     try:
-        import pytesseract  # type: ignore
         from PIL import Image  # type: ignore
         img = Image.open(path)
-        txt = pytesseract.image_to_string(img, lang=lang)
+        txt, info["engine"] = _ocr_pil(img, lang)
         return txt, info
     except Exception as e:
         info["error"] = f"ocr_error:{e}"
@@ -50,16 +151,22 @@ def ocr_image_to_text(path: Path, lang: str = "fra") -> Tuple[str, Dict[str, Any
 def pdf_ocr_text(path: Path, dpi: int = 200, lang: str = "fra") -> Tuple[str, Dict[str, Any]]:
     """
     Very defensive PDF > image OCR pipeline using pdf2image if present, else empty.
+    With OCR_WORKERS > 1, pages are rendered and OCR'd in parallel;
+    text is reassembled in page order.
     """
     info: Dict[str, Any] = {"engine": "pdf_ocr", "dpi": dpi, "lang": lang}
     try:
         from pdf2image import convert_from_path  # type: ignore
-        import pytesseract  # type: ignore
-        pages = convert_from_path(str(path), dpi=dpi)
-        texts: List[str] = []
-        for img in pages:
-            texts.append(pytesseract.image_to_string(img, lang=lang) or "")
-        return "\\n\\f\\n".join(texts).strip(), info
+        workers = _ocr_workers()
+        pages = convert_from_path(str(path), dpi=dpi, thread_count=workers)
+        if workers > 1 and len(pages) > 1:
+            results = list(_ocr_pool().map(lambda img: _ocr_pil(img, lang), pages))
+        else:
+            results = [_ocr_pil(img, lang) for img in pages]
+        texts: List[str] = [txt for txt, _ in results]
+        if results:
+            info["ocr_engine"] = results[0][1]
+        return "\n\f\n".join(texts).strip(), info
     except Exception as e:
         info["error"] = f"pdf_ocr_unavailable:{e}"
         return "", info
@@ -12,6 +12,11 @@ LABELS = {
     "total_tva":[r"\bTVA\b"],
 }
 
+_LABEL_RX = {k: re.compile(v[0], re.I) for k, v in LABELS.items()}
+# préfiltre : une seule recherche écarte les lignes sans aucun libellé
+_ANY_LABEL_RX = re.compile("|".join(f"(?:{v[0]})" for v in LABELS.values()), re.I)
+_NEAR_AMOUNT_RX = re.compile(r"([0-9][0-9\.\,\s]+)\s*€?")
+
 def ex_label_proximity(doc: Dict[str, any]) -> List[Cand]:
     text = doc.get("text") or ""
     lines = [l for l in text.splitlines() if l.strip()]
@@ -20,31 +25,32 @@ def ex_label_proximity(doc: Dict[str, any]) -> List[Cand]:
     def near_value(idx: int, max_ahead: int = 2):
         buf = " ".join(lines[idx: idx+1+max_ahead])
         # capture montant
-        m = re.search(r"([0-9][0-9\.\,\s]+)\s*€?", buf)
+        m = _NEAR_AMOUNT_RX.search(buf)
         return m.group(1) if m else None
 
     for i, line in enumerate(lines):
-        low = line.lower()
+        if not _ANY_LABEL_RX.search(line):
+            continue
         # seller/buyer blocs (pas des montants)
-        if re.search(LABELS["seller"][0], line, re.I):
+        if _LABEL_RX["seller"].search(line):
             chunk = " ".join(lines[i+1:i+5]).strip()
             if chunk:
                 cands.append(Cand("seller", chunk[:220], 0.7, "label-prox"))
-        if re.search(LABELS["buyer"][0], line, re.I):
+        if _LABEL_RX["buyer"].search(line):
             chunk = " ".join(lines[i+1:i+5]).strip()
             if chunk:
                 cands.append(Cand("buyer", chunk[:220], 0.7, "label-prox"))
 
         # montants
-        if re.search(LABELS["total_ht"][0], line, re.I):
+        if _LABEL_RX["total_ht"].search(line):
             v = near_value(i, 2)
             if v:
                 cands.append(Cand("total_ht", v, 0.75, "label-prox"))
-        if re.search(LABELS["total_ttc"][0], line, re.I):
+        if _LABEL_RX["total_ttc"].search(line):
             v = near_value(i, 2)
             if v:
                 cands.append(Cand("total_ttc", v, 0.8, "label-prox"))
-        if re.search(LABELS["total_tva"][0], line, re.I):
+        if _LABEL_RX["total_tva"].search(line):
             v = near_value(i, 2)
             if v:
                 cands.append(Cand("total_tva", v, 0.7, "label-prox"))
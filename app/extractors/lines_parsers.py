@@ -1,210 +1,231 @@
+# app/extractors/lines_parsers.py
+# Parseurs de lignes d'articles (texte brut, positions x pdfplumber, extract_table).
+# Non branchés : ni extract_document ni l'API (app/main.py) n'importent ce module.
 from __future__ import annotations
 from typing import Any, Dict, List, Optional, Tuple
 import re
-
-try:
-    import pdfplumber
-except Exception:
-    pdfplumber = None  # type: ignore
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import groupby
+from operator import itemgetter
 
 from .patterns import TABLE_HEADER_HINTS, FOOTER_NOISE_PAT, LINE_RX
 from .utils_amounts import _norm_amount
 
+_NON_DIGIT_RE = re.compile(r"[^0-9]")
+_DIGIT_RE = re.compile(r"[0-9]")
+_ACCENT_TRANS = str.maketrans("éèêàûï", "eeeaui")
+_WS_RE = re.compile(r"\s+")
+# une seule passe pour écarter les mots sans aucun indice d'en-tête
+_HEADER_ROLES = ("ref", "label", "qty", "unit", "amount")
+_HEADER_HINT_RE = re.compile("|".join(re.escape(h) for hints in TABLE_HEADER_HINTS for h in hints))
+
 def parse_lines_regex(text: str) -> List[Dict[str, Any]]:
     rows: List[Dict[str, Any]] = []
-    for m in LINE_RX.finditer(text or ""):
-        qty = int(m.group('qty'))
-        pu  = _norm_amount(m.group('pu'))
-        amt = _norm_amount(m.group('amt'))
-        if FOOTER_NOISE_PAT.search((m.group('label') or '') + ' ' + (m.group('ref') or '')):
+    # page par page : une page sans chiffre (CGV, annexes) ne peut contenir aucune ligne
+    for page_text in (text or "").split("\f"):
+        if not _DIGIT_RE.search(page_text):
             continue
-        rows.append({
-            "ref":        m.group('ref'),
-            "label":      m.group('label').strip(),
-            "qty":        qty,
-            "unit_price": pu,
-            "amount":     amt
-        })
+        for m in LINE_RX.finditer(page_text):
+            qty = int(m.group('qty'))
+            pu  = _norm_amount(m.group('pu'))
+            amt = _norm_amount(m.group('amt'))
+            if FOOTER_NOISE_PAT.search((m.group('label') or '') + ' ' + (m.group('ref') or '')):
+                continue
+            rows.append({
+                "ref":        m.group('ref'),
+                "label":      m.group('label').strip(),
+                "qty":        qty,
+                "unit_price": pu,
+                "amount":     amt
+            })
     return rows
 
-def _norm_header_cell(s: str) -> str:
-    s = (s or "").strip().lower()
-    s = (s.replace("é","e").replace("è","e").replace("ê","e")
-           .replace("à","a").replace("û","u").replace("ï","i"))
-    s = s.replace("\n"," ").replace("\t"," ")
-    s = re.sub(r"\s+"," ", s)
-    return s
+def _norm_text(s: str) -> str:
+    s = (s or "").strip().lower().translate(_ACCENT_TRANS)
+    return _WS_RE.sub(" ", s)
 
-def _map_header_indices(headers: List[str]) -> Optional[Dict[str, int]]:
-    idx: Dict[str, Optional[int]] = {}
-    norm = [_norm_header_cell(h) for h in headers]
-    def match_one(*cands):
-        for i, h in enumerate(norm):
-            for c in cands:
-                if c in h:
-                    return i
-        return None
-    idx["ref"]    = match_one(*TABLE_HEADER_HINTS[0])
-    idx["label"]  = match_one(*TABLE_HEADER_HINTS[1])
-    idx["qty"]    = match_one(*TABLE_HEADER_HINTS[2])
-    idx["unit"]   = match_one(*TABLE_HEADER_HINTS[3])
-    idx["amount"] = match_one(*TABLE_HEADER_HINTS[4])
-    if all(v is None for v in idx.values()):
+# mots et cellules d'en-tête se répètent d'une page / facture à l'autre
+_norm_header_cell = lru_cache(maxsize=4096)(_norm_text)
+
+def _parse_qty(s: str) -> Optional[int]:
+    digits = _NON_DIGIT_RE.sub("", s or "")
+    if not digits:
         return None
-    return {k: v for k, v in idx.items() if v is not None}
+    val = int(digits)
+    return val if val <= 999 else None
+
+# même vocabulaire de cellules d'une page à l'autre : résultat (tuple immuable) mémoïsé
+@lru_cache(maxsize=4096)
+def _header_hits(t: str) -> Tuple[str, ...]:
+    """
+    Roles whose header hints occur in the normalized cell text `t`.
+    """
+    if not _HEADER_HINT_RE.search(t):
+        return ()
+    return tuple(role for role, hints in zip(_HEADER_ROLES, TABLE_HEADER_HINTS) if any(c in t for c in hints))
+
+def _map_header_indices(headers: List[str]) -> Optional[Dict[str, int]]:
+    # une passe sur les cellules : première colonne où chaque rôle apparaît
+    idx: Dict[str, int] = {}
+    for i, h in enumerate(headers):
+        for role in _header_hits(_norm_header_cell(h)):
+            idx.setdefault(role, i)
+    return idx or None
+
+def _rows_from_page_words(words: List[dict], seen: Optional[set] = None) -> List[Dict[str, Any]]:
+    """
+    Rows of one page from its pdfplumber words (header, columns, body bands).
+    Rows whose key is already in `seen` are skipped (dedup across pages).
+    """
+    if seen is None:
+        seen = set()
+    rows: List[Dict[str, Any]] = []
+    # un tri stable sur le y entier puis groupby : lignes (y, mots) déjà dans l'ordre vertical,
+    # réutilisées par les trois balayages
+    keyed = sorted(((int((w["top"] + w["bottom"]) / 2), w) for w in words), key=itemgetter(0))
+    lines = [(yk, [w for _, w in grp]) for yk, grp in groupby(keyed, key=itemgetter(0))]
+    header_y = None
+    header_i = -1
+    header_cells: Dict[str, dict] = {}
+    norm = _norm_header_cell
+    for i, (yk, ws) in enumerate(lines):
+        score, hitmap = 0, {}
+        for w in ws:
+            for role in _header_hits(norm(w["text"])):
+                score += 1
+                hitmap[role] = w
+        if score >= 3:
+            header_y, header_i = yk, i
+            header_cells = hitmap
+            break
+    if header_y is None:
+        return rows
+    total_y = None
+    for yk, ws in lines[header_i + 1:]:
+        # mots sans espaces internes : normaliser la ligne jointe équivaut à normaliser chaque mot ;
+        # ligne jointe unique => _norm_text, hors du cache
+        txt = _norm_text(" ".join(w["text"] for w in ws))
+        if "total" in txt:
+            total_y = yk
+            break
+    cols = []
+    for role in ["ref", "label", "qty", "unit", "amount"]:
+        if role in header_cells:
+            w = header_cells[role]
+            cols.append((role, (w["x0"] + w["x1"]) / 2))
+    cols = sorted(cols, key=lambda t: t[1])
+    if not cols:
+        return rows
+    col_bounds: List[Tuple[str, float, float]] = []
+    for i, (role, xmid) in enumerate(cols):
+        if i == 0:
+            left = 0.0
+            right = (cols[i+1][1] + xmid) / 2 if i+1 < len(cols) else xmid + 9999
+        elif i == len(cols) - 1:
+            left = (cols[i-1][1] + xmid) / 2
+            right = 999999.0
+        else:
+            left = (cols[i-1][1] + xmid) / 2
+            right = (cols[i+1][1] + xmid) / 2
+        col_bounds.append((role, left, right))
+    # bornes contiguës et triées : recherche dichotomique sur les bords droits
+    col_roles  = [c[0] for c in col_bounds]
+    col_lefts  = [c[1] for c in col_bounds]
+    col_rights = [c[2] for c in col_bounds]
+    # corps du tableau : entre l'en-tête et la ligne de total (lignes triées par y)
+    bands: List[Tuple[int, List[dict]]] = []
+    for yk, ws in lines[header_i + 1:]:
+        if total_y is not None and yk >= total_y - 5:
+            break
+        if yk <= header_y + 5:
+            continue
+        ws = sorted(ws, key=itemgetter("x0"))
+        if not bands:
+            bands.append((yk, ws))
+        else:
+            last_y, last_ws = bands[-1]
+            if abs(yk - last_y) <= 6:
+                last_ws.extend(ws)
+            else:
+                bands.append((yk, ws))
+    for _, ws in bands:
+        full_text = " ".join(w["text"] for w in ws)
+        if FOOTER_NOISE_PAT.search(full_text):
+            continue
+        cells: Dict[str, List[str]] = {role: [] for role in col_roles}
+        for w in ws:
+            xmid = (w["x0"] + w["x1"]) / 2
+            ci = bisect_right(col_rights, xmid)
+            if ci < len(col_rights) and col_lefts[ci] <= xmid:
+                cells[col_roles[ci]].append(w["text"])
+        ref   = " ".join(cells.get("ref", [])).strip() or None
+        label = " ".join(cells.get("label", [])).strip() or None
+        qtys  = " ".join(cells.get("qty", [])).strip()
+        pu    = " ".join(cells.get("unit", [])).strip()
+        amt   = " ".join(cells.get("amount", [])).strip()
+        qty_i  = _parse_qty(qtys)
+        pu_f   = _norm_amount(pu)
+        amt_f  = _norm_amount(amt)
+        if FOOTER_NOISE_PAT.search((label or "") + " " + (ref or "")):
+            continue
+        if not (label or pu_f is not None or amt_f is not None or qty_i is not None or ref):
+            continue
+        if (not label) and ref:
+            label = ref
+        if amt_f is None and (pu_f is not None) and (qty_i is not None):
+            amt_f = round(pu_f * qty_i, 2)
+        if (qty_i is not None) and (not label) and (pu_f is None) and (amt_f is None):
+            continue
+        key = (ref, label or "", qty_i, pu_f, amt_f)
+        if key in seen:
+            continue
+        seen.add(key)
+        rows.append({
+            "ref":        ref,
+            "label":      label or "",
+            "qty":        qty_i,
+            "unit_price": pu_f,
+            "amount":     amt_f
+        })
+    return rows
 
 def parse_lines_by_xpos(pdf_path: str) -> List[Dict[str, Any]]:
-    if pdfplumber is None:
+    # import à la demande : pdfplumber/pdfminer ne sont chargés que si un parseur de tableau tourne
+    try:
+        import pdfplumber  # type: ignore
+    except Exception:
         return []
     rows: List[Dict[str, Any]] = []
+    seen: set = set()
     try:
         with pdfplumber.open(pdf_path) as pdf:
             for page in pdf.pages:
                 words = page.extract_words(x_tolerance=2, y_tolerance=2, keep_blank_chars=False)
+                # libère les objets parsés de la page : mémoire bornée à une page
+                page.close()
                 if not words:
                     continue
-                lines_by_y: Dict[int, List[dict]] = {}
-                for w in words:
-                    mid_y = int((w["top"] + w["bottom"]) / 2)
-                    lines_by_y.setdefault(mid_y, []).append(w)
-                header_y = None
-                header_cells: Dict[str, dict] = {}
-                def norm(s: str) -> str:
-                    return _norm_header_cell(s)
-                for yk, ws in sorted(lines_by_y.items(), key=lambda kv: kv[0]):
-                    score, hitmap = 0, {}
-                    for w in ws:
-                        t = norm(w["text"])
-                        if any(c in t for c in TABLE_HEADER_HINTS[2]): score += 1; hitmap["qty"]   = w
-                        if any(c in t for c in TABLE_HEADER_HINTS[3]): score += 1; hitmap["unit"]  = w
-                        if any(c in t for c in TABLE_HEADER_HINTS[4]): score += 1; hitmap["amount"]= w
-                        if any(c in t for c in TABLE_HEADER_HINTS[1]): score += 1; hitmap["label"] = w
-                        if any(c in t for c in TABLE_HEADER_HINTS[0]): score += 1; hitmap["ref"]   = w
-                    if score >= 3:
-                        header_y = yk
-                        header_cells = hitmap
-                        break
-                if header_y is None:
-                    continue
-                total_y = None
-                for yk, ws in sorted(lines_by_y.items(), key=lambda kv: kv[0]):
-                    if yk <= header_y:
-                        continue
-                    txt = " ".join(norm(w["text"]) for w in ws)
-                    if "total" in txt:
-                        total_y = yk
-                        break
-                cols = []
-                for role in ["ref", "label", "qty", "unit", "amount"]:
-                    if role in header_cells:
-                        w = header_cells[role]
-                        cols.append((role, (w["x0"] + w["x1"]) / 2))
-                cols = sorted(cols, key=lambda t: t[1])
-                if not cols:
-                    continue
-                col_bounds: List[Tuple[str, float, float]] = []
-                for i, (role, xmid) in enumerate(cols):
-                    if i == 0:
-                        left = 0.0
-                        right = (cols[i+1][1] + xmid) / 2 if i+1 < len(cols) else xmid + 9999
-                    elif i == len(cols) - 1:
-                        left = (cols[i-1][1] + xmid) / 2
-                        right = 999999.0
-                    else:
-                        left = (cols[i-1][1] + xmid) / 2
-                        right = (cols[i+1][1] + xmid) / 2
-                    col_bounds.append((role, left, right))
-                def in_body(yk: int) -> bool:
-                    if yk <= header_y + 5:
-                        return False
-                    if total_y is not None and yk >= total_y - 5:
-                        return False
-                    return True
-                bands: List[Tuple[int, List[dict]]] = []
-                for yk in sorted(lines_by_y.keys()):
-                    if not in_body(yk):
-                        continue
-                    ws = sorted(lines_by_y[yk], key=lambda w: w["x0"])
-                    if not bands:
-                        bands.append((yk, ws))
-                    else:
-                        last_y, last_ws = bands[-1]
-                        if abs(yk - last_y) <= 6:
-                            last_ws.extend(ws)
-                        else:
-                            bands.append((yk, ws))
-                for _, ws in bands:
-                    full_text = " ".join(w["text"] for w in ws)
-                    if FOOTER_NOISE_PAT.search(full_text):
-                        continue
-                    cells: Dict[str, List[str]] = {role: [] for (role, _, _) in col_bounds}
-                    for w in ws:
-                        xmid = (w["x0"] + w["x1"]) / 2
-                        for role, left, right in col_bounds:
-                            if left <= xmid < right:
-                                cells[role].append(w["text"])
-                                break
-                    ref   = " ".join(cells.get("ref", [])).strip() or None
-                    label = " ".join(cells.get("label", [])).strip() or None
-                    qtys  = " ".join(cells.get("qty", [])).strip()
-                    pu    = " ".join(cells.get("unit", [])).strip()
-                    amt   = " ".join(cells.get("amount", [])).strip()
-                    def _to_int(s: str) -> Optional[int]:
-                        s2 = re.sub(r"[^\d]", "", s or "")
-                        if not s2:
-                            return None
-                        try:
-                            val = int(s2)
-                            if val < 0 or val > 999:
-                                return None
-                            return val
-                        except Exception:
-                            return None
-                    qty_i  = _to_int(qtys)
-                    pu_f   = _norm_amount(pu)
-                    amt_f  = _norm_amount(amt)
-                    if FOOTER_NOISE_PAT.search((label or "") + " " + (ref or "")):
-                        continue
-                    if not (label or pu_f is not None or amt_f is not None or qty_i is not None or ref):
-                        continue
-                    if (not label) and ref:
-                        label = ref
-                    if amt_f is None and (pu_f is not None) and (qty_i is not None):
-                        amt_f = round(pu_f * qty_i, 2)
-                    if (qty_i is not None) and (not label) and (pu_f is None) and (amt_f is None):
-                        continue
-                    if label and FOOTER_NOISE_PAT.search(label):
-                        continue
-                    rows.append({
-                        "ref":        ref,
-                        "label":      label or "",
-                        "qty":        qty_i,
-                        "unit_price": pu_f,
-                        "amount":     amt_f
-                    })
-        uniq, seen = [], set()
-        for r in rows:
-            key = (r.get("ref"), r.get("label"), r.get("qty"), r.get("unit_price"), r.get("amount"))
-            if key in seen:
-                continue
-            seen.add(key)
-            uniq.append(r)
-        return uniq
+                rows.extend(_rows_from_page_words(words, seen))
+        return rows
     except Exception:
         return []
 
 def parse_lines_extract_table(pdf_path: str) -> List[Dict[str, Any]]:
-    if pdfplumber is None:
+    try:
+        import pdfplumber  # type: ignore
+    except Exception:
         return []
     rows: List[Dict[str, Any]] = []
+    seen: set = set()
     try:
         with pdfplumber.open(pdf_path) as pdf:
             for page in pdf.pages:
                 tables = []
+                # stratégie par défaut = lines/lines : un second appel explicite renvoyait la même table
                 t = page.extract_table()
                 if t: tables.append(t)
-                t2 = page.extract_table({"vertical_strategy":"lines", "horizontal_strategy":"lines"})
-                if t2: tables.append(t2)
+                page.close()
                 for tbl in tables:
                     tbl = [[(c or "").strip() for c in (row or [])] for row in (tbl or []) if any((row or []))]
                     if not tbl or len(tbl) < 2:
@@ -221,12 +242,7 @@ def parse_lines_extract_table(pdf_path: str) -> List[Dict[str, Any]]:
                         qty   = get(idx.get("qty"))
                         pu    = get(idx.get("unit"))
                         amt   = get(idx.get("amount"))
-                        try:
-                            qty_i = int(re.sub(r"[^\d]", "", qty)) if qty else None
-                            if qty_i is not None and (qty_i < 0 or qty_i > 999):
-                                qty_i = None
-                        except Exception:
-                            qty_i = None
+                        qty_i = _parse_qty(qty)
                         pu_f  = _norm_amount(pu)
                         amt_f = _norm_amount(amt)
                         if amt_f is None and pu_f is not None and qty_i is not None:
@@ -235,20 +251,19 @@ def parse_lines_extract_table(pdf_path: str) -> List[Dict[str, Any]]:
                             continue
                         if FOOTER_NOISE_PAT.search((label or "") + " " + (ref or "")):
                             continue
+                        ref = (ref or "").strip() or None
+                        label = (label or "").strip()
+                        key = (ref, label, qty_i, pu_f, amt_f)
+                        if key in seen:
+                            continue
+                        seen.add(key)
                         rows.append({
-                            "ref":        (ref or "").strip() or None,
-                            "label":      (label or "").strip(),
+                            "ref":        ref,
+                            "label":      label,
                             "qty":        qty_i,
                             "unit_price": pu_f,
                             "amount":     amt_f
                         })
-        uniq, seen = [], set()
-        for r in rows:
-            key = (r.get("ref"), r.get("label"), r.get("qty"), r.get("unit_price"), r.get("amount"))
-            if key in seen:
-                continue
-            seen.add(key)
-            uniq.append(r)
-        return uniq
+        return rows
     except Exception:
         return []
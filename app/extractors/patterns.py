@@ -2,11 +2,33 @@
 from __future__ import annotations
 import re
 
+try:
+    import re2 as _re2  # type: ignore  # google-re2 : moteur DFA, temps linéaire
+except Exception:
+    _re2 = None
+
 PATTERNS_VERSION = "v1.0.1"
 
+# seuls i / m / s passent tels quels en drapeaux inline vers re2
+_RE2_INLINE_FLAGS = ((re.IGNORECASE, "i"), (re.MULTILINE, "m"), (re.DOTALL, "s"))
+
+def _compile_linear(pattern: str, flags: int = 0):
+    """
+    Compile with re2 when available (linear time, no catastrophic backtracking),
+    else with re. Flags re2 cannot express inline (VERBOSE, ASCII...) keep re.
+    """
+    if _re2 is not None and not flags & ~(re.IGNORECASE | re.MULTILINE | re.DOTALL):
+        inline = "".join(c for f, c in _RE2_INLINE_FLAGS if flags & f)
+        try:
+            return _re2.compile(f"(?{inline}){pattern}" if inline else pattern)
+        except Exception:
+            pass
+    return re.compile(pattern, flags)
+
 # Dates: 31/12/2024, 2024-12-31, 31-12-2024
 DATE_RE = re.compile(
-    r"(?:^|[^0-9])((?:\d{1,2}[./-]){2}\d{2,4}|\d{4}-\d{2}-\d{2})(?:$|[^0-9])"
+    r"(?:^|[^0-9])((?:\d{1,2}[./-]){2}\d{2,4}|\d{4}-\d{2}-\d{2})(?:$|[^0-9])",
+    re.ASCII,
 )
 
 # Invoice number: "Facture n° 123-ABC", "Invoice # 2024-001"
@@ -24,9 +46,16 @@ INVOICE_NUM_RE = re.compile(
 EUR_STRICT_RE = re.compile(r"\b\d{1,3}(?:[\s\u00A0.]\d{3})*(?:[.,]\d{2})\b")
 
 # Totals proximity labels
-TOTAL_TTC_NEAR_RE = re.compile(r"(total\s*t\s*t\s*c|ttc|total\s*ttc|montant\s*ttc)", re.IGNORECASE)
-TOTAL_HT_NEAR_RE  = re.compile(r"(total\s*h\s*t|ht|total\s*ht|montant\s*ht)", re.IGNORECASE)
+# "total ttc" / "montant ttc" contiennent déjà "ttc" (idem pour "ht") : alternatives inutiles retirées
+TOTAL_TTC_NEAR_RE = re.compile(r"(total\s*t\s*t\s*c|ttc)", re.IGNORECASE)
+TOTAL_HT_NEAR_RE  = re.compile(r"(total\s*h\s*t|ht)", re.IGNORECASE)
 TVA_AMOUNT_NEAR_RE = re.compile(r"(tva|taxe\s*\b|vat)", re.IGNORECASE)
+# Union des trois : une seule passe pour écarter les lignes sans libellé de total
+TOTALS_NEAR_ANY_RE = re.compile(
+    "|".join(f"(?P<{k}>{rx.pattern})" for k, rx in
+             (("ttc", TOTAL_TTC_NEAR_RE), ("ht", TOTAL_HT_NEAR_RE), ("tva", TVA_AMOUNT_NEAR_RE))),
+    re.IGNORECASE,
+)
 
 # VAT rate like 20%, 5.5 %
 VAT_RATE_RE = re.compile(r"(\d{1,2}(?:[.,]\d)?\s*%)")
@@ -40,4 +69,40 @@ DESTINATAIRE_BLOCK = re.compile(r"(?s)(?:destinataire)\s*[:\n]+(.{10,300})", re.
 TVA_RE   = re.compile(r"\bTVA\b\s*:?\s*([A-Z0-9\s]+)", re.IGNORECASE)
 SIRET_RE = re.compile(r"\bSIRET\b\s*:?\s*(\d{14})", re.IGNORECASE)
 SIREN_RE = re.compile(r"\bSIREN\b\s*:?\s*(\d{9})", re.IGNORECASE)
-IBAN_RE  = re.compile(r"\b[A-Z]{2}\d{2}[A-Z0-9]{11,30}\b")
+IBAN_RE  = re.compile(r"\b[A-Z]{2}\d{2}[A-Z0-9]{11,30}\b", re.ASCII)
+
+# ---------------------------------------------------------------------------
+# Vocabulaire des tableaux d'articles : utilisé seulement par lines_parsers,
+# qu'aucun appel d'extract_document ni de l'API n'atteint
+# ---------------------------------------------------------------------------
+
+# Blancs unicode, ceux de \s pour re (\s de re2 est ASCII seulement) : en classe
+# explicite, un motif donne les mêmes correspondances avec les deux moteurs
+_UNICODE_WS = "".join(c for c in map(chr, range(0x3001)) if c.isspace())
+
+# Lignes d'articles en texte brut : "A1  Clavier  2  25,00  50,00"
+# (classes explicites plutôt que \s / \S / \d unicode ; l'espace insécable est listé à part)
+_LINE_RX_SRC = (
+    r"^[ \t]*(?:(?P<ref>[A-Z0-9][A-Z0-9._/-]*[0-9][A-Z0-9._/-]*)[ \t]+)?"
+    r"(?P<label>[^" + _UNICODE_WS + r"].*?)[ \t]+(?P<qty>[0-9]{1,3})[ \t]+"
+    r"(?P<pu>[0-9][0-9 .,\xA0]*[.,][0-9]{2})[ \t]*€?[ \t]+"
+    r"(?P<amt>[0-9][0-9 .,\xA0]*[.,][0-9]{2})[ \t]*€?[ \t]*$"
+)
+LINE_RX = _compile_linear(_LINE_RX_SRC, re.MULTILINE)
+
+# En-têtes de tableau, déjà normalisés (minuscules, sans accents) ;
+# ordre : ref, label, qty, unit, amount
+TABLE_HEADER_HINTS = (
+    ("ref", "code", "sku"),
+    ("designation", "description", "libelle", "article", "produit", "prestation"),
+    ("qte", "qty", "quantite"),
+    ("prix", "p.u", "pu", "unit"),
+    ("montant", "total", "amount"),
+)
+
+# Lignes à ignorer dans un tableau : totaux, taxes, pied de page, coordonnées bancaires
+FOOTER_NOISE_PAT = re.compile(
+    r"\b(?:sous[- ]?total|total|tva|net\s+[aà]\s+payer|reste\s+[aà]\s+payer"
+    r"|iban|bic|siret|siren|capital|page\s+\d+)\b",
+    re.IGNORECASE,
+)
@@ -1,20 +1,67 @@
 
 from __future__ import annotations
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import Any, Dict, Optional
+import multiprocessing
+import os
+import threading
+from typing import Any, Dict, List, Optional, Sequence
 import re as _re
 
 from .patterns import PATTERNS_VERSION, VAT_RATE_RE
 from .io_pdf_image import pdf_text, ocr_image_to_text, pdf_ocr_text
 from .fields import _fill_fields_from_text
-from .utils_amounts import _norm_amount
+from .doc_cache import cache_key, cache_get, cache_put
+
+_AMOUNT_HINT_RX = _re.compile(r"\b\d{1,3}(?:[ .]\d{3})*(?:[,.]\d{2})\b")
+# une seule passe (s'arrête au premier marqueur), sans copie .lower() du texte
+_INVOICE_MARKERS_RX = _re.compile(r"facture|invoice|total|tva|montant|ttc|€", _re.IGNORECASE)
+
+# OCR spéculatif (opt-in, OCR_SPECULATIVE=1) : sur les gros PDF, probablement scannés,
+# l'OCR démarre en parallèle de l'extraction texte et n'est attendu que si le texte
+# ne ressemble pas à une facture.
+_SPECULATIVE_OCR = os.getenv("OCR_SPECULATIVE", "") == "1"
+_SPECULATIVE_MIN_BYTES = 200_000
+# pool créé au premier OCR spéculatif : aucun thread tant que le flag est coupé
+_SPECULATIVE_POOL: Optional[ThreadPoolExecutor] = None
+_SPECULATIVE_POOL_LOCK = threading.Lock()
+# un seul OCR spéculatif à la fois : pas de file d'attente derrière un OCR devenu inutile
+_SPECULATIVE_SLOT = threading.Semaphore(1)
+
+def _reset_speculative_pool() -> None:
+    # un fork ne copie pas les threads du pool : l'enfant recrée le sien à la demande
+    global _SPECULATIVE_POOL, _SPECULATIVE_POOL_LOCK, _SPECULATIVE_SLOT
+    _SPECULATIVE_POOL = None
+    _SPECULATIVE_POOL_LOCK = threading.Lock()
+    _SPECULATIVE_SLOT = threading.Semaphore(1)
+
+if hasattr(os, "register_at_fork"):  # absent sous Windows
+    os.register_at_fork(after_in_child=_reset_speculative_pool)
+
+def _submit_speculative_ocr(p: Path) -> Optional[Future]:
+    """
+    Start OCR of `p` on the speculative pool, or return None if it is busy.
+    """
+    global _SPECULATIVE_POOL
+    slot = _SPECULATIVE_SLOT
+    if not slot.acquire(blocking=False):
+        return None
+    try:
+        with _SPECULATIVE_POOL_LOCK:
+            if _SPECULATIVE_POOL is None:
+                _SPECULATIVE_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ocr-spec")
+            fut = _SPECULATIVE_POOL.submit(pdf_ocr_text, p)
+    except Exception:
+        slot.release()
+        return None
+    fut.add_done_callback(lambda _f: slot.release())
+    return fut
 
 def _looks_like_invoice_text(t: str) -> bool:
-    t_low = (t or "").lower()
-    markers = ["facture", "invoice", "total", "tva", "montant", "ttc", "€"]
-    if any(m in t_low for m in markers):
+    if _INVOICE_MARKERS_RX.search(t or ""):
         return True
-    if _re.search(r"\\b\\d{1,3}(?:[ .]\\d{3})*(?:[,.]\\d{2})\\b", t or ""):
+    if _AMOUNT_HINT_RX.search(t or ""):
         return True
     return False
 
@@ -30,6 +77,8 @@ def _extract_vat_rate(text: str) -> Optional[float]:
 
 def _post_compute_totals(fields: Dict[str, Any], vat_rate: Optional[float]) -> None:
     ht, tva, ttc = fields.get("total_ht"), fields.get("total_tva"), fields.get("total_ttc")
+    if ht is not None and tva is not None and ttc is not None:
+        return
     # compute missing piece if possible
     if ht is not None and ttc is not None and tva is None:
         fields["total_tva"] = round(float(ttc) - float(ht), 2)
@@ -41,8 +90,45 @@ def _post_compute_totals(fields: Dict[str, Any], vat_rate: Optional[float]) -> N
         fields["total_tva"] = round(float(ht) * vat_rate/100.0, 2)
         fields.setdefault("total_ttc", round(float(ht) + fields["total_tva"], 2))
 
+def _cacheable(result: Dict[str, Any]) -> bool:
+    # un échec (lecture PDF, OCR) ou une extraction vide ne doit pas être servi
+    # depuis le cache : le prochain envoi du même fichier doit retenter
+    info = result["meta"].get("io_info") or {}
+    if "error" in info or "error" in (info.get("ocr") or {}):
+        return False
+    return any(v is not None for v in result["fields"].values())
+
 def extract_document(path: str, ocr: str = "auto") -> Dict[str, Any]:
     p = Path(path)
+    key = cache_key(p, ocr)
+    if key is not None:
+        hit = cache_get(key)
+        if hit is not None:
+            hit["meta"]["source"] = str(p)
+            hit["meta"].setdefault("hints", {})["cache"] = "hit"
+            return hit
+    result = _extract_document(p, ocr)
+    if key is not None and _cacheable(result):
+        cache_put(key, result)
+    return result
+
+def extract_documents(paths: Sequence[str], ocr: str = "auto", workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Extract several documents in parallel processes (text extraction and regex scans hold the GIL).
+    Results are returned in the order of `paths`. Workers are spawned, so a calling
+    script needs the usual `if __name__ == "__main__":` guard. Each worker imports
+    the `app` package, which runs app.main.create_app() once (Flask app, instance dirs).
+    """
+    paths = list(paths)
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+    if workers <= 1:
+        return [extract_document(p, ocr) for p in paths]
+    # spawn : des processus neufs, sans les pools de threads (morts) hérités d'un fork
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as ex:
+        return list(ex.map(partial(extract_document, ocr=ocr), paths,
+                           chunksize=max(1, len(paths) // (workers * 4))))
+
+def _extract_document(p: Path, ocr: str) -> Dict[str, Any]:
     ext = p.suffix.lower()
     result: Dict[str, Any] = {"meta": {"version": PATTERNS_VERSION, "source": str(p)}, "fields": {}}
 
@@ -50,13 +136,31 @@ def extract_document(path: str, ocr: str = "auto") -> Dict[str, Any]:
     info = {}
 
     if ext == ".pdf":
-        txt, info = pdf_text(p)
+        ocr_future = None
+        if ocr == "auto" and _SPECULATIVE_OCR and p.stat().st_size >= _SPECULATIVE_MIN_BYTES:
+            ocr_future = _submit_speculative_ocr(p)
+        # en auto, une couche texte vide (pdfium lisible, aucun caractère) => PDF scanné :
+        # OCR d'abord, pdfminer seulement si l'OCR ne rend rien
+        txt, info = pdf_text(p, fallback_on_empty=(ocr != "auto"))
         text = txt or ""
+        scanned = ocr == "auto" and not text and "pdfium_error" not in info
         if ocr in ("force", "pdf_ocr") or (ocr == "auto" and not _looks_like_invoice_text(text)):
-            txt2, info2 = pdf_ocr_text(p)
+            # cancel() échoue si l'OCR tourne déjà (ou est fini) : on attend son résultat ;
+            # encore en file => annulé, OCR fait ici plutôt que d'attendre le pool
+            if ocr_future is not None and not ocr_future.cancel():
+                txt2, info2 = ocr_future.result()
+            else:
+                txt2, info2 = pdf_ocr_text(p)
             if txt2:
                 text = txt2
                 info = {**info, **{"ocr": info2}}
+            elif scanned:
+                txt, info = pdf_text(p)
+                text = txt or ""
+                info = {**info, **{"ocr": info2}}
+        elif ocr_future is not None:
+            # sans effet sur un OCR déjà lancé ; le créneau se libère à sa fin
+            ocr_future.cancel()
     elif ext in (".png", ".jpg", ".jpeg"):
         txt, info = ocr_image_to_text(p)
         text = txt or ""
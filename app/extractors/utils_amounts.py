@@ -1,22 +1,30 @@
 
 from __future__ import annotations
+from itertools import islice
+
+# €, espaces et espaces insécables (y compris fines) supprimés en une seule passe
+_AMOUNT_STRIP = str.maketrans("", "", "€\u00A0\u202F ")
 
 def _norm_amount(s: str | None) -> float | None:
     if not s:
         return None
-    s = s.strip().replace("€","").replace("\u00A0"," ").replace(" ","")
-    # if comma as decimal sep and dot as thousands
-    if "," in s and s.count(",") == 1 and "." in s:
-        s = s.replace(".","").replace(",",".")
-    elif "," in s and s.count(",") == 1:
-        s = s.replace(",",".")
+    s = s.strip().translate(_AMOUNT_STRIP)
+    last_comma = s.rfind(",")
+    if last_comma >= 0:
+        # le séparateur le plus à droite est le décimal
+        if last_comma > s.rfind("."):
+            # "1.234,56" : virgule décimale, points de milliers
+            s = s.replace(".","").replace(",",".")
+        else:
+            # "1,234.56" : point décimal, virgules de milliers
+            s = s.replace(",","")
     try:
         return float(s)
-    except Exception:
+    except ValueError:
         return None
 
 def _clean_block(block: str | None, max_lines: int = 6) -> str | None:
     if not block:
         return None
-    lines = [l.strip() for l in block.splitlines() if l.strip()]
-    return "\\n".join(lines[:max_lines]).strip() or None
+    lines = list(islice((s for s in (l.strip() for l in block.splitlines()) if s), max_lines))
+    return "\n".join(lines).strip() or None
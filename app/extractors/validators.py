@@ -1,6 +1,10 @@
 # app/extractors/validators.py
 import re
-from typing import Any, Optional
+from typing import Any
+
+_ISO_DATE_RE = re.compile(r"\b\d{4}-\d{2}-\d{2}\b", re.ASCII)
+_FR_IBAN_RE  = re.compile(r"\bFR\d{12,}\b", re.ASCII)
+_SIRET_RE    = re.compile(r"\b\d{9,14}\b", re.ASCII)
 
 def soft_validate(field: str, value: Any) -> float:
     """Renvoie un multiplicateur 0..1 (qualité) selon le champ."""
@@ -17,13 +21,13 @@ def soft_validate(field: str, value: Any) -> float:
 
     if field == "invoice_date":
         # très simple: yyyy-mm-dd dedans ?
-        return 0.9 if re.search(r"\b\d{4}-\d{2}-\d{2}\b", s) else 0.6
+        return 0.9 if _ISO_DATE_RE.search(s) else 0.6
 
     if field == "seller_iban":
-        return 1.0 if re.search(r"\bFR\d{12,}\b", s.replace(" ","")) else 0.7
+        return 1.0 if _FR_IBAN_RE.search(s.replace(" ","")) else 0.7
 
     if field == "seller_siret":
-        return 1.0 if re.search(r"\b\d{9,14}\b", s) else 0.6
+        return 1.0 if _SIRET_RE.search(s) else 0.6
 
     if field in ("seller","buyer"):
         # au moins quelques lettres + chiffres (adresse)
@@ -0,0 +1,69 @@
+# tests/test_doc_cache.py
+import copy
+
+import pytest
+
+from app.extractors import doc_cache, pdf_basic
+
+def _result(fields=None, io_info=None):
+    return {"meta": {"version": "t", "source": "x", "io_info": io_info or {}},
+            "fields": fields if fields is not None else {"invoice_number": "F-1", "total_ttc": 12.0}}
+
+@pytest.fixture
+def calls(monkeypatch):
+    state = {"n": 0, "result": _result()}
+
+    def fake(p, ocr):
+        state["n"] += 1
+        return copy.deepcopy(state["result"])
+
+    monkeypatch.setattr(pdf_basic, "_extract_document", fake)
+    monkeypatch.setattr(doc_cache, "CACHE_SIZE", 8)
+    doc_cache._CACHE.clear()
+    yield state
+    doc_cache._CACHE.clear()
+
+@pytest.fixture
+def pdf(tmp_path):
+    f = tmp_path / "a.pdf"
+    f.write_bytes(b"%PDF-1.4 same bytes")
+    return f
+
+def test_miss_then_hit(calls, pdf, tmp_path):
+    first = pdf_basic.extract_document(str(pdf))
+    assert calls["n"] == 1
+    assert "cache" not in first["meta"].get("hints", {})
+    other = tmp_path / "b.pdf"
+    other.write_bytes(pdf.read_bytes())
+    second = pdf_basic.extract_document(str(other))
+    assert calls["n"] == 1
+    assert second["meta"]["hints"]["cache"] == "hit"
+    assert second["meta"]["source"] == str(other)
+    assert second["fields"] == first["fields"]
+
+def test_hit_is_a_deep_copy(calls, pdf):
+    pdf_basic.extract_document(str(pdf))
+    hit = pdf_basic.extract_document(str(pdf))
+    hit["fields"]["total_ttc"] = 0.0
+    hit["meta"]["io_info"]["x"] = 1
+    again = pdf_basic.extract_document(str(pdf))
+    assert again["fields"]["total_ttc"] == 12.0
+    assert "x" not in again["meta"]["io_info"]
+
+@pytest.mark.parametrize("ocr", ["force", "pdf_ocr"])
+def test_forced_ocr_bypasses_cache(calls, pdf, ocr):
+    pdf_basic.extract_document(str(pdf), ocr=ocr)
+    pdf_basic.extract_document(str(pdf), ocr=ocr)
+    assert calls["n"] == 2
+
+@pytest.mark.parametrize("result", [
+    _result(io_info={"engine": "pdf_ocr", "ocr": {"error": "pdf_ocr_unavailable:x"}}),
+    _result(io_info={"engine": "PyPDF2", "error": "pdf_read_error:x"}),
+    _result(fields={"invoice_number": None, "total_ttc": None}),
+])
+def test_failed_extraction_is_not_cached(calls, pdf, result):
+    calls["result"] = result
+    pdf_basic.extract_document(str(pdf))
+    pdf_basic.extract_document(str(pdf))
+    assert calls["n"] == 2
+    assert not doc_cache._CACHE
@@ -0,0 +1,40 @@
+# tests/test_lines_parsers.py
+from pathlib import Path
+
+import pytest
+
+from app.extractors.lines_parsers import parse_lines_regex
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+EXPECTED_ROWS = [
+    {"ref": "A12", "label": "Clavier", "qty": 2, "unit_price": 25.0, "amount": 50.0},
+    {"ref": "B7", "label": "Souris", "qty": 2, "unit_price": 25.0, "amount": 50.0},
+]
+
+def test_parse_lines_regex():
+    text = (
+        "REF1 Widget bleu 2 10,00 20,00\n"
+        "TOTAL 3 1,00 3,00\n"
+        "A-9 Cable 3 1.234,50 3.703,50\n"
+        "B7 Vis 4 1,00 4,00"
+    )
+    rows = parse_lines_regex(text)
+    assert [(r["ref"], r["label"], r["qty"], r["unit_price"], r["amount"]) for r in rows] == [
+        ("REF1", "Widget bleu", 2, 10.0, 20.0),
+        ("A-9", "Cable", 3, 1234.5, 3703.5),
+        ("B7", "Vis", 4, 1.0, 4.0),
+    ]
+
+def _rows(rows):
+    return [{k: r.get(k) for k in EXPECTED_ROWS[0]} for r in rows]
+
+def test_parse_lines_by_xpos():
+    pytest.importorskip("pdfplumber")
+    from app.extractors.lines_parsers import parse_lines_by_xpos
+    assert _rows(parse_lines_by_xpos(str(FIXTURES / "invoice.pdf"))) == EXPECTED_ROWS
+
+def test_parse_lines_extract_table():
+    pytest.importorskip("pdfplumber")
+    from app.extractors.lines_parsers import parse_lines_extract_table
+    assert _rows(parse_lines_extract_table(str(FIXTURES / "invoice.pdf"))) == EXPECTED_ROWS
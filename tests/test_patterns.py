@@ -0,0 +1,34 @@
+# tests/test_patterns.py
+import pytest
+
+from app.extractors.fields import _fill_fields_from_text
+
+
+def test_party_blocks_nbsp_before_colon():
+    # espace insécable avant ":" (typographie française)
+    f = _fill_fields_from_text("Vendeur\u00a0: ACME SARL 12 rue X\nClient\u00a0: Bob Corp 5 av Y")
+    assert f["seller"] and f["seller"].startswith("ACME SARL")
+    assert f["buyer"] and f["buyer"].startswith("Bob Corp")
+
+def test_compile_linear_keeps_flags_re2_cannot_express():
+    import re
+    from app.extractors.patterns import _compile_linear
+    assert _compile_linear(r"a b", re.VERBOSE).search("ab")
+
+def test_line_rx_same_matches_with_re2_and_re():
+    # re2 et re doivent découper ref / libellé / montants de la même façon
+    re2 = pytest.importorskip("re2")
+    import re
+    from app.extractors.patterns import _LINE_RX_SRC
+    rx2 = re2.compile("(?m)" + _LINE_RX_SRC)
+    rx = re.compile(_LINE_RX_SRC, re.MULTILINE)
+    text = "\n".join((
+        "A1 \u00a0Clavier 2 25,00 50,00",
+        "A1\u2003Souris 1 9,90 9,90",
+        "\u00a0 Câble USB 3 2,00 6,00",
+        "B22 \u202fÉcran 1 1 234,56 1 234,56 €",
+        "REF1 Widget bleu 2 10,00 20,00",
+    ))
+    got = [(m.span(), m.groupdict()) for m in rx2.finditer(text)]
+    assert got == [(m.span(), m.groupdict()) for m in rx.finditer(text)]
+    assert got
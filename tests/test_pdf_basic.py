@@ -0,0 +1,46 @@
+# tests/test_pdf_basic.py
+from pathlib import Path
+
+import pytest
+
+from app.extractors import doc_cache, pdf_basic
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+@pytest.fixture
+def no_cache(monkeypatch):
+    monkeypatch.setattr(doc_cache, "CACHE_SIZE", 0)
+
+def test_cover_page_does_not_hide_invoice(monkeypatch, no_cache):
+    # page 1 = simple couverture ("p1"), la facture est en page 2
+    monkeypatch.setattr(pdf_basic, "pdf_ocr_text", lambda p, *a, **k: ("logo ACME", {"engine": "pdf_ocr"}))
+    res = pdf_basic.extract_document(str(FIXTURES / "cover.pdf"))
+    assert res["fields"]["invoice_number"] == "F-2024-001"
+    assert res["fields"]["total_ttc"] == 120.0
+    assert res["meta"]["io_info"]["pages"] == 2
+
+@pytest.fixture
+def pdfminer_calls(monkeypatch):
+    hl = pytest.importorskip("pdfminer.high_level")
+    calls = []
+
+    def fake(path, *a, **k):
+        calls.append(path)
+        return "Facture N° F-2024-009\fTotal TTC 48,00 EUR"
+
+    monkeypatch.setattr(hl, "extract_text", fake)
+    return calls
+
+def test_scanned_pdf_goes_to_ocr_before_pdfminer(monkeypatch, no_cache, pdfminer_calls):
+    monkeypatch.setattr(pdf_basic, "pdf_ocr_text", lambda p, *a, **k: ("Facture N° F-2024-007\nTotal TTC 36,00 EUR", {"engine": "pdf_ocr"}))
+    res = pdf_basic.extract_document(str(FIXTURES / "blank.pdf"))
+    assert pdfminer_calls == []
+    assert res["fields"]["invoice_number"] == "F-2024-007"
+    assert res["meta"]["io_info"]["ocr"]["engine"] == "pdf_ocr"
+
+def test_scanned_pdf_falls_back_to_pdfminer_when_ocr_is_empty(monkeypatch, no_cache, pdfminer_calls):
+    monkeypatch.setattr(pdf_basic, "pdf_ocr_text", lambda p, *a, **k: ("", {"engine": "pdf_ocr", "error": "pdf_ocr_unavailable:x"}))
+    res = pdf_basic.extract_document(str(FIXTURES / "blank.pdf"))
+    assert len(pdfminer_calls) == 1
+    assert res["fields"]["invoice_number"] == "F-2024-009"
+    assert res["meta"]["io_info"]["engine"] == "pdfminer"
@@ -0,0 +1,35 @@
+# tests/test_utils_amounts.py
+import pytest
+
+from app.extractors.fields import _fill_fields_from_text
+from app.extractors.utils_amounts import _clean_block, _norm_amount
+
+def test_clean_block_strips_lines_and_drops_empty():
+    assert _clean_block("  ACME SARL \n\n 12 rue X\nParis ") == "ACME SARL\n12 rue X\nParis"
+
+def test_clean_block_max_lines():
+    assert _clean_block("a\n\nb\nc\nd", max_lines=2) == "a\nb"
+
+def test_clean_block_empty():
+    assert _clean_block(None) is None
+    assert _clean_block(" \n \n") is None
+
+def test_party_block_uses_real_newlines():
+    f = _fill_fields_from_text("Vendeur: ACME SARL\n12 rue X\n\nClient: Bob Corp")
+    assert f["seller"] and "\n" in f["seller"]
+    assert "\\n" not in f["seller"]
+
+@pytest.mark.parametrize("raw, expected", [
+    ("1,234.56", 1234.56),
+    ("1\u202f234,56", 1234.56),
+    ("1.234,56", 1234.56),
+    ("1 234,56", 1234.56),
+    ("1\u00a0234,56 €", 1234.56),
+    ("12,5", 12.5),
+    ("1234.56", 1234.56),
+    ("12,34,56", None),
+    ("abc", None),
+    ("", None),
+])
+def test_norm_amount(raw, expected):
+    assert _norm_amount(raw) == expected